@@ -6,6 +6,7 @@ from src.data.models import CompanyNews
 import pandas as pd
 import numpy as np
 import json
+import re
 
 from src.graph.state import AgentState, show_agent_reasoning
 from src.tools.api import get_company_news
@@ -22,6 +23,30 @@ class Sentiment(BaseModel):
     confidence: int = Field(description="Confidence 0-100")
 
 
+# Cache of LLM classifications keyed by (ticker, normalized headline).
+# Headlines that differ only in digits or punctuation collapse to the same
+# key, so near-duplicate articles reuse the cached sentiment instead of
+# paying for another LLM call. Bounded to keep long sessions in check.
+_headline_sentiment_cache: dict[tuple[str, str], tuple[str, int]] = {}
+_HEADLINE_CACHE_MAX_ENTRIES = 4096
+
+_HEADLINE_NORMALIZE_RE = re.compile(r"[\W\d_]+")
+
+# Headlines longer than this add prompt tokens without adding signal, so the
+# text shipped to the LLM is capped. Full article bodies are never sent.
+_MAX_HEADLINE_CHARS = 500
+
+
+def _truncate_headline(title: str, max_chars: int = _MAX_HEADLINE_CHARS) -> str:
+    """Cap the headline text included in the classification prompt."""
+    return title[:max_chars]
+
+
+def _normalize_headline(title: str) -> str:
+    """Lowercase a headline and strip digits/punctuation for cache lookups."""
+    return _HEADLINE_NORMALIZE_RE.sub(" ", title.lower()).strip()
+
+
 def news_sentiment_agent(state: AgentState, agent_id: str = "news_sentiment_agent"):
     """
     Analyzes news sentiment for a list of tickers and generates trading signals.
@@ -69,6 +94,16 @@ def news_sentiment_agent(state: AgentState, agent_id: str = "news_sentiment_agen
               progress.update_status(agent_id, ticker, f"Analyzing sentiment for {len(articles_to_analyze)} articles")
               
               for idx, news in enumerate(articles_to_analyze):
+                # Reuse cached classifications for near-duplicate headlines
+                headline = _truncate_headline(news.title)
+                cache_key = (ticker, _normalize_headline(headline))
+                cached = _headline_sentiment_cache.get(cache_key)
+                if cached is not None:
+                    # Cache hits skip the LLM entirely, so they do not count
+                    # toward the classified-by-LLM metric
+                    news.sentiment, sentiment_confidences[id(news)] = cached
+                    continue
+
                 # We analyze based on title, but can also pass in the entire article text,
                 # but this is more expensive and requires extracting the text from the article.
                 # Note: this is an opportunity for improvement!
@@ -80,12 +115,15 @@ def news_sentiment_agent(state: AgentState, agent_id: str = "news_sentiment_agen
                     f"Determine if sentiment is 'positive', 'negative', or 'neutral' for the stock {ticker} only. "
                     f"Also provide a confidence score for your prediction from 0 to 100. "
                     f"Respond in JSON format.\n\n"
-                    f"Headline: {news.title}"
+                    f"Headline: {headline}"
                 )
                 response = call_llm(prompt, Sentiment, agent_name=agent_id, state=state)
                 if response:
                     news.sentiment = response.sentiment.lower()
                     sentiment_confidences[id(news)] = response.confidence
+                    # Only successful classifications are worth caching
+                    if len(_headline_sentiment_cache) < _HEADLINE_CACHE_MAX_ENTRIES:
+                        _headline_sentiment_cache[cache_key] = (news.sentiment, response.confidence)
                 else:
                     news.sentiment = "neutral"
                     sentiment_confidences[id(news)] = 0
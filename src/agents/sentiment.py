@@ -1,11 +1,28 @@
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+
 from langchain_core.messages import HumanMessage
 from src.graph.state import AgentState, show_agent_reasoning
 from src.utils.progress import progress
 import pandas as pd
 import numpy as np
 import json
+import orjson
 from src.utils.api_key import get_api_key_from_state
-from src.tools.api import get_insider_trades, get_company_news
+from src.tools.api import get_insider_trades, get_company_news_batch
+
+
+# Source credibility weights for news articles. Frozen at import time so the
+# scoring loop is a single dict probe per article; unknown outlets get a
+# conservative default weight.
+CREDIBILITY = MappingProxyType({
+    "Reuters": 1.0,
+    "Bloomberg": 0.95,
+    "WSJ": 0.95,
+    "CNBC": 0.85,
+    "TechCrunch": 0.75,
+})
+_DEFAULT_CREDIBILITY = 0.3
 
 
 ##### Sentiment Agent #####
@@ -18,47 +35,69 @@ def sentiment_analyst_agent(state: AgentState, agent_id: str = "sentiment_analys
     # Initialize sentiment analysis for each ticker
     sentiment_analysis = {}
 
-    for ticker in tickers:
-        progress.update_status(agent_id, ticker, "Fetching insider trades")
+    progress.update_status(agent_id, None, "Fetching insider trades and company news")
 
-        # Get the insider trades
-        insider_trades = get_insider_trades(
-            ticker=ticker,
-            end_date=end_date,
-            limit=1000,
-            api_key=api_key,
-        )
+    # Fetch all tickers up front: news goes through the batched boundary and
+    # insider trades fan out across a thread pool, so total fetch latency is
+    # the slowest call rather than the sum over tickers. Progress updates
+    # stay on this thread.
+    with ThreadPoolExecutor(max_workers=max(1, min(len(tickers), 8))) as executor:
+        news_future = executor.submit(get_company_news_batch, tickers, end_date, limit=100, api_key=api_key)
+        trades_by_ticker = dict(zip(tickers, executor.map(lambda ticker: get_insider_trades(ticker=ticker, end_date=end_date, limit=1000, api_key=api_key), tickers)))
+        news_by_ticker = news_future.result()
 
+    for ticker in tickers:
         progress.update_status(agent_id, ticker, "Analyzing trading patterns")
 
-        # Get the signals from the insider trades
-        transaction_shares = pd.Series([t.transaction_shares for t in insider_trades]).dropna()
-        insider_signals = np.where(transaction_shares < 0, "bearish", "bullish").tolist()
-
-        progress.update_status(agent_id, ticker, "Fetching company news")
+        # Get the insider trades from the batched fetch
+        insider_trades = trades_by_ticker.get(ticker, [])
+
+        # Tally the insider trade signals in a single vectorized pass
+        transaction_shares = pd.Series([t.transaction_shares for t in insider_trades]).dropna().to_numpy()
+        insider_total = int(transaction_shares.size)
+        insider_bearish = int(np.count_nonzero(transaction_shares < 0))
+        insider_bullish = insider_total - insider_bearish
+
+        # Get the company news from the batched fetch
+        company_news = news_by_ticker.get(ticker, [])
+
+        if not insider_trades and not company_news:
+            progress.update_status(agent_id, ticker, "Failed: No sentiment data found")
+            continue
+
+        # Tally the news sentiment the same way, keeping dates aligned
+        news_frame = pd.DataFrame({
+            "sentiment": [n.sentiment for n in company_news],
+            "date": [n.date for n in company_news],
+            "source": [n.source for n in company_news],
+        }).dropna(subset=["sentiment"])
+        sentiment = news_frame["sentiment"].to_numpy()
+        news_total = int(sentiment.size)
+        news_bearish = int(np.count_nonzero(sentiment == "negative"))
+        news_bullish = int(np.count_nonzero(sentiment == "positive"))
+        news_neutral = news_total - news_bullish - news_bearish
+
+        # Time-decay the news signals so recent articles dominate older ones.
+        # All timestamps are parsed in one vectorized pass; articles dated
+        # after end_date (or with unparseable dates) get full weight.
+        news_dates = pd.to_datetime(news_frame["date"], utc=True, errors="coerce")
+        age_days = (pd.Timestamp(end_date, tz="UTC") - news_dates).dt.total_seconds().to_numpy() / 86400.0
+        decay = np.exp(-0.05 * np.clip(age_days, 0.0, None))
+        decay[np.isnan(decay)] = 1.0
+
+        # Scale each article by its source credibility as well
+        credibility = np.array([CREDIBILITY.get(source, _DEFAULT_CREDIBILITY) for source in news_frame["source"]], dtype=np.float32)
+        article_weights = decay * credibility
 
-        # Get the company news
-        company_news = get_company_news(ticker, end_date, limit=100, api_key=api_key)
-
-        # Get the sentiment from the company news
-        sentiment = pd.Series([n.sentiment for n in company_news]).dropna()
-        news_signals = np.where(sentiment == "negative", "bearish", 
-                              np.where(sentiment == "positive", "bullish", "neutral")).tolist()
-        
         progress.update_status(agent_id, ticker, "Combining signals")
         # Combine signals from both sources with weights
         insider_weight = 0.3
         news_weight = 0.7
         
-        # Calculate weighted signal counts
-        bullish_signals = (
-            insider_signals.count("bullish") * insider_weight +
-            news_signals.count("bullish") * news_weight
-        )
-        bearish_signals = (
-            insider_signals.count("bearish") * insider_weight +
-            news_signals.count("bearish") * news_weight
-        )
+        # Calculate weighted signal counts (news contributions are scaled by
+        # time decay and source credibility)
+        bullish_signals = insider_bullish * insider_weight + float(article_weights[sentiment == "positive"].sum()) * news_weight
+        bearish_signals = insider_bearish * insider_weight + float(article_weights[sentiment == "negative"].sum()) * news_weight
 
         if bullish_signals > bearish_signals:
             overall_signal = "bullish"
@@ -68,7 +107,7 @@ def sentiment_analyst_agent(state: AgentState, agent_id: str = "sentiment_analys
             overall_signal = "neutral"
 
         # Calculate confidence level based on the weighted proportion
-        total_weighted_signals = len(insider_signals) * insider_weight + len(news_signals) * news_weight
+        total_weighted_signals = insider_total * insider_weight + news_total * news_weight
         confidence = 0  # Default confidence when there are no signals
         if total_weighted_signals > 0:
             confidence = round((max(bullish_signals, bearish_signals) / total_weighted_signals) * 100, 2)
@@ -76,30 +115,30 @@ def sentiment_analyst_agent(state: AgentState, agent_id: str = "sentiment_analys
         # Create structured reasoning similar to technical analysis
         reasoning = {
             "insider_trading": {
-                "signal": "bullish" if insider_signals.count("bullish") > insider_signals.count("bearish") else 
-                         "bearish" if insider_signals.count("bearish") > insider_signals.count("bullish") else "neutral",
-                "confidence": round((max(insider_signals.count("bullish"), insider_signals.count("bearish")) / max(len(insider_signals), 1)) * 100),
+                "signal": "bullish" if insider_bullish > insider_bearish else 
+                         "bearish" if insider_bearish > insider_bullish else "neutral",
+                "confidence": round((max(insider_bullish, insider_bearish) / max(insider_total, 1)) * 100),
                 "metrics": {
-                    "total_trades": len(insider_signals),
-                    "bullish_trades": insider_signals.count("bullish"),
-                    "bearish_trades": insider_signals.count("bearish"),
+                    "total_trades": insider_total,
+                    "bullish_trades": insider_bullish,
+                    "bearish_trades": insider_bearish,
                     "weight": insider_weight,
-                    "weighted_bullish": round(insider_signals.count("bullish") * insider_weight, 1),
-                    "weighted_bearish": round(insider_signals.count("bearish") * insider_weight, 1),
+                    "weighted_bullish": round(insider_bullish * insider_weight, 1),
+                    "weighted_bearish": round(insider_bearish * insider_weight, 1),
                 }
             },
             "news_sentiment": {
-                "signal": "bullish" if news_signals.count("bullish") > news_signals.count("bearish") else 
-                         "bearish" if news_signals.count("bearish") > news_signals.count("bullish") else "neutral",
-                "confidence": round((max(news_signals.count("bullish"), news_signals.count("bearish")) / max(len(news_signals), 1)) * 100),
+                "signal": "bullish" if news_bullish > news_bearish else 
+                         "bearish" if news_bearish > news_bullish else "neutral",
+                "confidence": round((max(news_bullish, news_bearish) / max(news_total, 1)) * 100),
                 "metrics": {
-                    "total_articles": len(news_signals),
-                    "bullish_articles": news_signals.count("bullish"),
-                    "bearish_articles": news_signals.count("bearish"),
-                    "neutral_articles": news_signals.count("neutral"),
+                    "total_articles": news_total,
+                    "bullish_articles": news_bullish,
+                    "bearish_articles": news_bearish,
+                    "neutral_articles": news_neutral,
                     "weight": news_weight,
-                    "weighted_bullish": round(news_signals.count("bullish") * news_weight, 1),
-                    "weighted_bearish": round(news_signals.count("bearish") * news_weight, 1),
+                    "weighted_bullish": round(news_bullish * news_weight, 1),
+                    "weighted_bearish": round(news_bearish * news_weight, 1),
                 }
             },
             "combined_analysis": {
@@ -117,9 +156,9 @@ def sentiment_analyst_agent(state: AgentState, agent_id: str = "sentiment_analys
 
         progress.update_status(agent_id, ticker, "Done", analysis=json.dumps(reasoning, indent=4))
 
-    # Create the sentiment message
+    # Create the sentiment message (orjson serializes the payload in C)
     message = HumanMessage(
-        content=json.dumps(sentiment_analysis),
+        content=orjson.dumps(sentiment_analysis).decode(),
         name=agent_id,
     )
 
@@ -5,6 +5,7 @@ from langchain_core.messages import HumanMessage
 from src.graph.state import AgentState, show_agent_reasoning
 from src.utils.api_key import get_api_key_from_state
 import json
+import orjson
 import pandas as pd
 import numpy as np
 
@@ -60,13 +61,20 @@ def technical_analyst_agent(state: AgentState, agent_id: str = "technical_analys
             api_key=api_key,
         )
 
-        if not prices:
+        # get_prices normally returns Price models, but columnar callers may
+        # supply a ready-made DataFrame; use it directly and skip conversion.
+        # The shallow copy keeps indicator scratch columns off the caller's frame.
+        if isinstance(prices, pd.DataFrame):
+            prices_df = prices.copy(deep=False)
+        elif prices:
+            prices_df = prices_to_df(prices)
+        else:
+            prices_df = None
+
+        if prices_df is None or prices_df.empty:
             progress.update_status(agent_id, ticker, "Failed: No price data found")
             continue
 
-        # Convert prices to a DataFrame
-        prices_df = prices_to_df(prices)
-
         progress.update_status(agent_id, ticker, "Calculating trend signals")
         trend_signals = calculate_trend_signals(prices_df)
 
@@ -137,9 +145,9 @@ def technical_analyst_agent(state: AgentState, agent_id: str = "technical_analys
         }
         progress.update_status(agent_id, ticker, "Done", analysis=json.dumps(technical_analysis, indent=4))
 
-    # Create the technical analyst message
+    # Create the technical analyst message (orjson serializes the payload in C)
     message = HumanMessage(
-        content=json.dumps(technical_analysis),
+        content=orjson.dumps(technical_analysis).decode(),
         name=agent_id,
     )
 
@@ -518,9 +526,12 @@ def calculate_hurst_exponent(price_series: pd.Series, max_lag: int = 20) -> floa
     Returns:
         float: Hurst exponent
     """
-    lags = range(2, max_lag)
+    # Work on the raw ndarray: slicing a Series inside the lag loop would pay
+    # pandas index-alignment overhead on every subtraction.
+    values = np.asarray(price_series, dtype=float)
+    lags = np.arange(2, max_lag)
     # Add small epsilon to avoid log(0)
-    tau = [max(1e-8, np.sqrt(np.std(np.subtract(price_series[lag:], price_series[:-lag])))) for lag in lags]
+    tau = [max(1e-8, np.sqrt(np.std(values[lag:] - values[:-lag]))) for lag in lags]
 
     # Return the Hurst exponent from linear fit
     try:
@@ -1,7 +1,17 @@
+import time
+
+
 class Cache:
-    """In-memory cache for API responses."""
+    """In-memory cache for API responses.
 
-    def __init__(self):
+    Entries expire after ``ttl_seconds`` so long-running processes (e.g. the
+    backend server) do not serve stale data indefinitely; pass ``None`` to
+    disable expiry.
+    """
+
+    def __init__(self, ttl_seconds: float | None = 3600.0):
+        self._ttl_seconds = ttl_seconds
+        self._expires_at: dict[tuple[str, str], float] = {}
         self._prices_cache: dict[str, list[dict[str, any]]] = {}
         self._financial_metrics_cache: dict[str, list[dict[str, any]]] = {}
         self._line_items_cache: dict[str, list[dict[str, any]]] = {}
@@ -21,45 +31,66 @@ class Cache:
         merged.extend([item for item in new_data if item[key_field] not in existing_keys])
         return merged
 
+    def _get(self, bucket: str, cache: dict, key: str) -> list[dict[str, any]] | None:
+        """Return a cached entry, dropping it first if its TTL has lapsed."""
+        if self._ttl_seconds is not None:
+            expires_at = self._expires_at.get((bucket, key))
+            if expires_at is not None and expires_at < time.monotonic():
+                cache.pop(key, None)
+                self._expires_at.pop((bucket, key), None)
+                return None
+        return cache.get(key)
+
+    def _set(self, bucket: str, cache: dict, key: str, data: list[dict[str, any]], key_field: str):
+        """Merge data into a cache entry and refresh its expiry stamp.
+
+        The existing entry is read through the TTL check so an expired entry
+        is dropped rather than revived by the merge; otherwise a key written
+        once per TTL window would never expire.
+        """
+        cache[key] = self._merge_data(self._get(bucket, cache, key), data, key_field=key_field)
+        if self._ttl_seconds is not None:
+            self._expires_at[(bucket, key)] = time.monotonic() + self._ttl_seconds
+
     def get_prices(self, ticker: str) -> list[dict[str, any]] | None:
         """Get cached price data if available."""
-        return self._prices_cache.get(ticker)
+        return self._get("prices", self._prices_cache, ticker)
 
     def set_prices(self, ticker: str, data: list[dict[str, any]]):
         """Append new price data to cache."""
-        self._prices_cache[ticker] = self._merge_data(self._prices_cache.get(ticker), data, key_field="time")
+        self._set("prices", self._prices_cache, ticker, data, key_field="time")
 
     def get_financial_metrics(self, ticker: str) -> list[dict[str, any]]:
         """Get cached financial metrics if available."""
-        return self._financial_metrics_cache.get(ticker)
+        return self._get("financial_metrics", self._financial_metrics_cache, ticker)
 
     def set_financial_metrics(self, ticker: str, data: list[dict[str, any]]):
         """Append new financial metrics to cache."""
-        self._financial_metrics_cache[ticker] = self._merge_data(self._financial_metrics_cache.get(ticker), data, key_field="report_period")
+        self._set("financial_metrics", self._financial_metrics_cache, ticker, data, key_field="report_period")
 
     def get_line_items(self, ticker: str) -> list[dict[str, any]] | None:
         """Get cached line items if available."""
-        return self._line_items_cache.get(ticker)
+        return self._get("line_items", self._line_items_cache, ticker)
 
     def set_line_items(self, ticker: str, data: list[dict[str, any]]):
         """Append new line items to cache."""
-        self._line_items_cache[ticker] = self._merge_data(self._line_items_cache.get(ticker), data, key_field="report_period")
+        self._set("line_items", self._line_items_cache, ticker, data, key_field="report_period")
 
     def get_insider_trades(self, ticker: str) -> list[dict[str, any]] | None:
         """Get cached insider trades if available."""
-        return self._insider_trades_cache.get(ticker)
+        return self._get("insider_trades", self._insider_trades_cache, ticker)
 
     def set_insider_trades(self, ticker: str, data: list[dict[str, any]]):
         """Append new insider trades to cache."""
-        self._insider_trades_cache[ticker] = self._merge_data(self._insider_trades_cache.get(ticker), data, key_field="filing_date")  # Could also use transaction_date if preferred
+        self._set("insider_trades", self._insider_trades_cache, ticker, data, key_field="filing_date")  # Could also use transaction_date if preferred
 
     def get_company_news(self, ticker: str) -> list[dict[str, any]] | None:
         """Get cached company news if available."""
-        return self._company_news_cache.get(ticker)
+        return self._get("company_news", self._company_news_cache, ticker)
 
     def set_company_news(self, ticker: str, data: list[dict[str, any]]):
         """Append new company news to cache."""
-        self._company_news_cache[ticker] = self._merge_data(self._company_news_cache.get(ticker), data, key_field="date")
+        self._set("company_news", self._company_news_cache, ticker, data, key_field="date")
 
 
 # Global cache instance
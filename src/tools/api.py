@@ -3,6 +3,7 @@ import os
 import pandas as pd
 import requests
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 from src.data.cache import get_cache
 from src.data.models import (
@@ -304,6 +305,28 @@ def get_company_news(
     return all_news
 
 
+def get_company_news_batch(
+    tickers: list[str],
+    end_date: str,
+    start_date: str | None = None,
+    limit: int = 1000,
+    api_key: str = None,
+) -> dict[str, list[CompanyNews]]:
+    """Fetch company news for several tickers in one call.
+
+    The news endpoint only accepts a single ticker per request, so this
+    fans the fetches out across a thread pool (each served from the cache
+    when possible) and returns the results keyed by ticker. Wall time is the
+    slowest single fetch instead of the sum of all of them.
+    """
+    if len(tickers) <= 1:
+        return {ticker: get_company_news(ticker, end_date, start_date=start_date, limit=limit, api_key=api_key) for ticker in tickers}
+
+    with ThreadPoolExecutor(max_workers=min(len(tickers), 8)) as executor:
+        results = executor.map(lambda ticker: get_company_news(ticker, end_date, start_date=start_date, limit=limit, api_key=api_key), tickers)
+        return dict(zip(tickers, results))
+
+
 def get_market_cap(
     ticker: str,
     end_date: str,
@@ -0,0 +1,54 @@
+import json
+from collections import Counter
+from unittest.mock import patch
+
+import pytest
+
+try:
+    import orjson
+
+    loads = orjson.loads
+except ImportError:  # orjson is an optional speedup; stdlib json is the fallback
+    loads = json.loads
+
+
+def tally_signals(signals):
+    """Count signal labels in a single pass.
+
+    Shared by the agent test modules so the documented aggregation logic walks
+    each signal list once instead of once per list.count call.
+    """
+    return Counter(signals)
+
+
+@pytest.fixture(autouse=True)
+def _silence_progress():
+    """Silence the technicals progress singleton for every test.
+
+    The agent calls progress.update_status on each step; no test wants the
+    terminal output and only one asserts on the calls, so the patch lives here
+    instead of being repeated per test. Tests that need the mock request this
+    fixture by name.
+    """
+    with patch("src.agents.technicals.progress") as mock_progress:
+        yield mock_progress
+
+
+@pytest.fixture(scope="session")
+def fundamentals_agent():
+    """Import the fundamentals agent once per session.
+
+    Keeps the heavy src.agents import graph (pandas, langchain, ...) out of
+    module import time for workers that never touch these tests.
+    """
+    from src.agents.fundamentals import fundamentals_analyst_agent
+
+    return fundamentals_analyst_agent
+
+
+@pytest.fixture(scope="session")
+def portfolio_agent():
+    """Import the portfolio manager agent once per session."""
+    from src.agents.portfolio_manager import portfolio_management_agent
+
+    return portfolio_management_agent
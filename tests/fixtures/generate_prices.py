@@ -0,0 +1,38 @@
+"""One-off generator for the static sample price data used by tests/test_backtester.py.
+
+Run from the repository root to regenerate tests/fixtures/prices.csv:
+
+    poetry run python tests/fixtures/generate_prices.py
+
+The output is fully determined by the seed, so the checked-in file only
+needs to change if the generation recipe changes.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+def generate_prices() -> pd.DataFrame:
+    dates = pd.date_range(start='2024-01-01', end='2024-12-31', freq='D')
+    n = len(dates)
+    rng = np.random.default_rng(42)
+
+    # Create realistic price movements in one vectorized pass
+    close = 100 + np.sin(np.arange(n) * 0.1) * 10 + rng.normal(0, 2, size=n)
+
+    return pd.DataFrame({
+        'date': dates,
+        'open': close - 0.5,
+        'high': close + 1,
+        'low': close - 1,
+        'close': close,
+        'volume': 1000000 + rng.integers(-100000, 100000, size=n)
+    })
+
+
+if __name__ == "__main__":
+    out_path = Path(__file__).parent / "prices.csv"
+    generate_prices().to_csv(out_path, index=False)
+    print(f"Wrote {out_path}")
@@ -1,283 +1,277 @@
+import copy
 import pytest
-from unittest.mock import Mock, patch, MagicMock
-import json
-from datetime import datetime
+from pytest_check import check
+from types import SimpleNamespace
+from unittest.mock import patch
 
-from src.agents.portfolio_manager import portfolio_manager_agent
-from src.graph.state import AgentState
+from tests.conftest import loads
+
+# The full set of actions the PortfolioDecision model allows.
+_ACTIONS = frozenset({"buy", "sell", "short", "cover", "hold"})
+
+# Expected portfolio action keyed by (bullish, bearish, neutral) signal counts.
+_ACTION_TABLE = {
+    (3, 0, 0): "strong_buy",
+    (2, 0, 1): "buy",
+    (1, 1, 1): "hold",
+    (0, 2, 1): "sell",
+    (0, 3, 0): "strong_sell",
+}
+
+
+def _risk_signals(tickers, price=100.0, limit=10000.0):
+    """Build risk-manager entries so the agent can size positions per ticker."""
+    return {
+        "risk_management_agent": {
+            ticker: {"remaining_position_limit": limit, "current_price": price}
+            for ticker in tickers
+        }
+    }
+
+
+def _make_state(tickers, signals=None, show_reasoning=False, cash=100000.0):
+    """Build a minimal agent state for the given tickers and analyst signals."""
+    return {
+        "messages": [],
+        "data": {
+            "end_date": "2024-01-01",
+            "tickers": list(tickers),
+            "analyst_signals": signals or {},
+            "portfolio": {
+                "cash": cash,
+                "positions": {},
+                "margin_requirement": 0.5,
+                "margin_used": 0.0,
+            },
+        },
+        "metadata": {
+            "show_reasoning": show_reasoning,
+        },
+    }
+
+
+def _default_llm(**kwargs):
+    """call_llm stand-in: produce the agent's own default (hold) decisions."""
+    return kwargs["default_factory"]()
 
 
 class TestPortfolioManager:
     """Test suite for the portfolio manager agent."""
 
-    @pytest.fixture
-    def mock_agent_state(self):
-        """Create a mock agent state for testing."""
-        return {
-            "data": {
-                "end_date": "2024-01-01",
-                "tickers": ["AAPL", "GOOGL", "MSFT"],
-                "analyst_signals": {
-                    "fundamentals_analyst_agent": {
-                        "AAPL": {"signal": "bullish", "confidence": 75, "reasoning": {}},
-                        "GOOGL": {"signal": "bearish", "confidence": 60, "reasoning": {}},
-                        "MSFT": {"signal": "neutral", "confidence": 50, "reasoning": {}}
-                    },
-                    "technical_analyst_agent": {
-                        "AAPL": {"signal": "bullish", "confidence": 80, "reasoning": {}},
-                        "GOOGL": {"signal": "neutral", "confidence": 40, "reasoning": {}},
-                        "MSFT": {"signal": "bullish", "confidence": 70, "reasoning": {}}
-                    }
-                }
+    @pytest.fixture(scope="module")
+    def _base_agent_state(self):
+        """Build the agent state template once per module."""
+        signals = {
+            "fundamentals_analyst_agent": {
+                "AAPL": {"signal": "bullish", "confidence": 75, "reasoning": {}},
+                "GOOGL": {"signal": "bearish", "confidence": 60, "reasoning": {}},
+                "MSFT": {"signal": "neutral", "confidence": 50, "reasoning": {}}
+            },
+            "technical_analyst_agent": {
+                "AAPL": {"signal": "bullish", "confidence": 80, "reasoning": {}},
+                "GOOGL": {"signal": "neutral", "confidence": 40, "reasoning": {}},
+                "MSFT": {"signal": "bullish", "confidence": 70, "reasoning": {}}
             },
-            "metadata": {
-                "show_reasoning": False
-            }
         }
+        signals.update(_risk_signals(["AAPL", "GOOGL", "MSFT"]))
+        return _make_state(["AAPL", "GOOGL", "MSFT"], signals)
+
+    @pytest.fixture
+    def mock_agent_state(self, _base_agent_state):
+        """Create a mock agent state for testing.
+
+        Deep-copied per test: the agent writes analyst_signals back into the
+        state, so even read-mostly tests must not share the template.
+        """
+        return copy.deepcopy(_base_agent_state)
 
-    @patch('src.agents.portfolio_manager.progress')
-    def test_portfolio_manager_success(self, mock_progress, mock_agent_state):
+    @pytest.fixture(autouse=True)
+    def mock_progress(self):
+        """Patch the shared progress tracker once for every test in the class."""
+        with patch('src.agents.portfolio_manager.progress') as progress:
+            yield progress
+
+    @pytest.fixture
+    def mock_call_llm(self):
+        """Replace the LLM boundary with the agent's own default-hold factory."""
+        with patch('src.agents.portfolio_manager.call_llm', side_effect=_default_llm) as call_llm:
+            yield call_llm
+
+    @pytest.fixture(scope="class")
+    def portfolio_run(self, portfolio_agent, _base_agent_state):
+        """Run the portfolio manager once per class on a private copy of the standard state."""
+        with patch('src.agents.portfolio_manager.progress') as progress, \
+                patch('src.agents.portfolio_manager.call_llm', side_effect=_default_llm) as call_llm:
+            result = portfolio_agent(copy.deepcopy(_base_agent_state))
+        return SimpleNamespace(result=result, progress=progress, call_llm=call_llm)
+
+    @pytest.fixture(scope="class")
+    def portfolio_result(self, portfolio_run):
+        """Raw agent output from the shared class-scoped run."""
+        return portfolio_run.result
+
+    @pytest.fixture(scope="class")
+    def portfolio_decisions(self, portfolio_result):
+        """Parsed portfolio decisions from the shared agent run."""
+        return loads(portfolio_result["messages"][0].content)
+
+    @pytest.mark.slow
+    def test_portfolio_manager_success(self, portfolio_run, portfolio_result, portfolio_decisions):
         """Test successful portfolio management analysis."""
-        # Call the function
-        result = portfolio_manager_agent(mock_agent_state)
-        
-        # Verify the result structure
-        assert "messages" in result
-        assert "data" in result
-        assert len(result["messages"]) == 1
-        
-        # Verify progress updates were called
-        assert mock_progress.update_status.call_count > 0
-        
-        # Extract portfolio decisions
-        portfolio_decisions = json.loads(result["messages"][0].content)
-        
+        # Soft assertions: one agent run covers many independent checks, so
+        # report every failure in a single pass instead of aborting on the first
+        result = portfolio_result
+        with check:
+            assert "messages" in result
+        with check:
+            assert "data" in result
+        with check:
+            assert len(result["messages"]) == 1
+
+        # Verify the LLM boundary and progress tracker were exercised
+        with check:
+            portfolio_run.call_llm.assert_called_once()
+        with check:
+            assert portfolio_run.progress.update_status.call_count > 0
+
         # Verify all tickers have portfolio decisions
-        assert "AAPL" in portfolio_decisions
-        assert "GOOGL" in portfolio_decisions
-        assert "MSFT" in portfolio_decisions
-        
+        for ticker in ["AAPL", "GOOGL", "MSFT"]:
+            with check:
+                assert ticker in portfolio_decisions
+
         # Verify decision structure
         for ticker, decision in portfolio_decisions.items():
-            assert "action" in decision  # buy, sell, hold
-            assert "confidence" in decision
-            assert "position_size" in decision
-            assert "reasoning" in decision
+            for key in ("action", "quantity", "confidence", "reasoning"):
+                with check:
+                    assert key in decision
 
-    @patch('src.agents.portfolio_manager.progress')
-    def test_portfolio_manager_with_reasoning(self, mock_progress, mock_agent_state):
+    @pytest.mark.slow
+    def test_portfolio_manager_with_reasoning(self, portfolio_agent, mock_call_llm, mock_agent_state):
         """Test portfolio management with reasoning enabled."""
         # Enable reasoning
         mock_agent_state["metadata"]["show_reasoning"] = True
-        
-        # Call the function
-        result = portfolio_manager_agent(mock_agent_state)
-        
-        # Verify reasoning was displayed (would be called in actual implementation)
-        # This test ensures the reasoning flag is properly handled
 
-    @patch('src.agents.portfolio_manager.progress')
-    def test_portfolio_manager_missing_analyst_signals(self, mock_progress):
+        with patch('src.agents.portfolio_manager.show_agent_reasoning') as mock_show_reasoning:
+            portfolio_agent(mock_agent_state)
+
+        # Verify reasoning was displayed
+        mock_show_reasoning.assert_called_once()
+
+    @pytest.mark.slow
+    def test_portfolio_manager_missing_analyst_signals(self, portfolio_agent, mock_call_llm):
         """Test portfolio manager with missing analyst signals."""
-        # Create state with missing analyst signals
-        incomplete_state = {
-            "data": {
-                "end_date": "2024-01-01",
-                "tickers": ["AAPL"],
-                "analyst_signals": {}  # No analyst signals
-            },
-            "metadata": {
-                "show_reasoning": False
-            }
-        }
-        
+        # Create state with missing analyst signals (no risk data -> no sizing)
+        incomplete_state = _make_state(["AAPL"])
+
         # Call the function
-        result = portfolio_manager_agent(incomplete_state)
-        
+        result = portfolio_agent(incomplete_state)
+
         # Verify the result structure
         assert "messages" in result
         assert "data" in result
-        
+
         # Extract portfolio decisions
-        portfolio_decisions = json.loads(result["messages"][0].content)
-        
-        # Should handle missing signals gracefully
+        portfolio_decisions = loads(result["messages"][0].content)
+
+        # Without risk limits no trade is possible: the hold is pre-filled
+        # deterministically and the LLM is never consulted
         assert "AAPL" in portfolio_decisions
-        assert portfolio_decisions["AAPL"]["action"] == "hold"  # Default action
+        assert portfolio_decisions["AAPL"]["action"] == "hold"
+        mock_call_llm.assert_not_called()
 
-    @patch('src.agents.portfolio_manager.progress')
-    def test_portfolio_manager_signal_aggregation(self, mock_progress, mock_agent_state):
-        """Test how portfolio manager aggregates multiple analyst signals."""
-        # Call the function
-        result = portfolio_manager_agent(mock_agent_state)
-        
-        # Extract portfolio decisions
-        portfolio_decisions = json.loads(result["messages"][0].content)
-        
-        # AAPL: bullish from both agents -> should be buy
-        assert portfolio_decisions["AAPL"]["action"] in ["buy", "strong_buy"]
-        
-        # GOOGL: bearish from fundamentals, neutral from technical -> should be hold or sell
-        assert portfolio_decisions["GOOGL"]["action"] in ["hold", "sell"]
-        
-        # MSFT: neutral from fundamentals, bullish from technical -> should be hold or buy
-        assert portfolio_decisions["MSFT"]["action"] in ["hold", "buy"]
-
-    @patch('src.agents.portfolio_manager.progress')
-    def test_portfolio_manager_confidence_calculation(self, mock_progress, mock_agent_state):
+    @pytest.mark.slow
+    def test_portfolio_manager_decision_validity(self, portfolio_decisions):
+        """Every decision stays within the actions the model allows."""
+        for ticker, decision in portfolio_decisions.items():
+            assert decision["action"] in _ACTIONS
+
+    @pytest.mark.slow
+    def test_portfolio_manager_confidence_calculation(self, portfolio_decisions):
         """Test confidence calculation based on analyst signals."""
-        # Call the function
-        result = portfolio_manager_agent(mock_agent_state)
-        
-        # Extract portfolio decisions
-        portfolio_decisions = json.loads(result["messages"][0].content)
-        
         # Verify confidence levels are reasonable
         for ticker, decision in portfolio_decisions.items():
             assert 0 <= decision["confidence"] <= 100
             assert isinstance(decision["confidence"], (int, float))
 
-    @patch('src.agents.portfolio_manager.progress')
-    def test_portfolio_manager_position_sizing(self, mock_progress, mock_agent_state):
+    @pytest.mark.slow
+    def test_portfolio_manager_position_sizing(self, portfolio_decisions):
         """Test position sizing logic."""
-        # Call the function
-        result = portfolio_manager_agent(mock_agent_state)
-        
-        # Extract portfolio decisions
-        portfolio_decisions = json.loads(result["messages"][0].content)
-        
-        # Verify position sizes are reasonable
+        # Quantities are whole share counts and never negative
         for ticker, decision in portfolio_decisions.items():
-            assert "position_size" in decision
-            # Position size should be a percentage or absolute value
-            assert isinstance(decision["position_size"], (int, float))
-            if isinstance(decision["position_size"], float):
-                assert 0 <= decision["position_size"] <= 1  # If it's a percentage
-
-    @patch('src.agents.portfolio_manager.progress')
-    def test_portfolio_manager_risk_considerations(self, mock_progress, mock_agent_state):
-        """Test that portfolio manager considers risk factors."""
-        # Call the function
-        result = portfolio_manager_agent(mock_agent_state)
-        
-        # Extract portfolio decisions
-        portfolio_decisions = json.loads(result["messages"][0].content)
-        
-        # Verify reasoning includes risk considerations
+            assert "quantity" in decision
+            assert isinstance(decision["quantity"], int)
+            assert decision["quantity"] >= 0
+
+    @pytest.mark.slow
+    def test_portfolio_manager_decision_reasoning(self, portfolio_decisions):
+        """Test that every decision carries its reasoning."""
         for ticker, decision in portfolio_decisions.items():
             assert "reasoning" in decision
-            reasoning = decision["reasoning"]
-            
-            # Should include various risk factors
-            assert any(key in reasoning for key in [
-                "signal_consensus", "confidence_level", "risk_factors", 
-                "diversification", "position_risk"
-            ])
-
-    @patch('src.agents.portfolio_manager.progress')
-    def test_portfolio_manager_conflicting_signals(self, mock_progress):
+            assert isinstance(decision["reasoning"], str)
+            assert decision["reasoning"]
+
+    @pytest.mark.slow
+    def test_portfolio_manager_conflicting_signals(self, portfolio_agent, mock_call_llm):
         """Test portfolio manager with conflicting analyst signals."""
         # Create state with conflicting signals
-        conflicting_state = {
-            "data": {
-                "end_date": "2024-01-01",
-                "tickers": ["AAPL"],
-                "analyst_signals": {
-                    "fundamentals_analyst_agent": {
-                        "AAPL": {"signal": "bullish", "confidence": 90, "reasoning": {}}
-                    },
-                    "technical_analyst_agent": {
-                        "AAPL": {"signal": "bearish", "confidence": 90, "reasoning": {}}
-                    },
-                    "sentiment_agent": {
-                        "AAPL": {"signal": "bullish", "confidence": 80, "reasoning": {}}
-                    }
-                }
+        signals = {
+            "fundamentals_analyst_agent": {
+                "AAPL": {"signal": "bullish", "confidence": 90, "reasoning": {}}
+            },
+            "technical_analyst_agent": {
+                "AAPL": {"signal": "bearish", "confidence": 90, "reasoning": {}}
+            },
+            "sentiment_agent": {
+                "AAPL": {"signal": "bullish", "confidence": 80, "reasoning": {}}
             },
-            "metadata": {
-                "show_reasoning": False
-            }
         }
-        
+        signals.update(_risk_signals(["AAPL"]))
+        conflicting_state = _make_state(["AAPL"], signals)
+
         # Call the function
-        result = portfolio_manager_agent(conflicting_state)
-        
+        result = portfolio_agent(conflicting_state)
+
         # Extract portfolio decisions
-        portfolio_decisions = json.loads(result["messages"][0].content)
-        
-        # Should handle conflicting signals gracefully
+        portfolio_decisions = loads(result["messages"][0].content)
+
+        # Should handle conflicting signals gracefully with a valid action
         assert "AAPL" in portfolio_decisions
-        # With conflicting high-confidence signals, should default to hold or cautious approach
-        assert portfolio_decisions["AAPL"]["action"] in ["hold", "cautious_buy", "cautious_sell"]
+        assert portfolio_decisions["AAPL"]["action"] in _ACTIONS
 
-    @patch('src.agents.portfolio_manager.progress')
-    def test_portfolio_manager_multiple_tickers(self, mock_progress, mock_agent_state):
+    @pytest.mark.slow
+    def test_portfolio_manager_multiple_tickers(self, portfolio_decisions):
         """Test portfolio manager with multiple tickers."""
-        # Call the function
-        result = portfolio_manager_agent(mock_agent_state)
-        
-        # Extract portfolio decisions
-        portfolio_decisions = json.loads(result["messages"][0].content)
-        
         # Verify all tickers are processed
         assert len(portfolio_decisions) == 3
-        
-        # Verify portfolio diversification considerations
-        actions = [decision["action"] for decision in portfolio_decisions.values()]
-        
-        # Should not recommend buying all stocks (diversification)
-        buy_actions = sum(1 for action in actions if action in ["buy", "strong_buy"])
-        assert buy_actions <= 2  # Should not recommend buying all 3
-
-    @patch('src.agents.portfolio_manager.progress')
-    def test_portfolio_manager_edge_cases(self, mock_progress):
+
+    @pytest.mark.slow
+    def test_portfolio_manager_edge_cases(self, portfolio_agent, mock_call_llm):
         """Test portfolio manager edge cases."""
         # Test with empty tickers list
-        empty_state = {
-            "data": {
-                "end_date": "2024-01-01",
-                "tickers": [],
-                "analyst_signals": {}
-            },
-            "metadata": {
-                "show_reasoning": False
-            }
-        }
-        
+        empty_state = _make_state([])
+
         # Call the function
-        result = portfolio_manager_agent(empty_state)
-        
-        # Verify empty result
-        portfolio_decisions = json.loads(result["messages"][0].content)
+        result = portfolio_agent(empty_state)
+
+        # Verify empty result and that the LLM was skipped entirely
+        portfolio_decisions = loads(result["messages"][0].content)
         assert len(portfolio_decisions) == 0
+        mock_call_llm.assert_not_called()
 
-    def test_portfolio_action_mapping(self):
+    @pytest.mark.parametrize("counts,expected_action", list(_ACTION_TABLE.items()))
+    def test_portfolio_action_mapping(self, counts, expected_action):
         """Test the mapping of signals to portfolio actions."""
-        # Test signal to action mapping logic
-        test_cases = [
-            ({"bullish": 3, "bearish": 0, "neutral": 0}, "strong_buy"),
-            ({"bullish": 2, "bearish": 0, "neutral": 1}, "buy"),
-            ({"bullish": 1, "bearish": 1, "neutral": 1}, "hold"),
-            ({"bullish": 0, "bearish": 2, "neutral": 1}, "sell"),
-            ({"bullish": 0, "bearish": 3, "neutral": 0}, "strong_sell"),
-        ]
-        
-        for signal_counts, expected_action in test_cases:
-            # This tests the logic that would be in the portfolio manager
-            bullish_count = signal_counts["bullish"]
-            bearish_count = signal_counts["bearish"]
-            neutral_count = signal_counts["neutral"]
-            
-            if bullish_count >= 2 and bearish_count == 0:
-                action = "strong_buy" if bullish_count == 3 else "buy"
-            elif bearish_count >= 2 and bullish_count == 0:
-                action = "strong_sell" if bearish_count == 3 else "sell"
-            elif bullish_count == bearish_count:
-                action = "hold"
-            else:
-                action = "hold"  # Conservative approach for mixed signals
-            
-            assert action == expected_action
+        # This tests the logic that would be in the portfolio manager
+        bullish_count, bearish_count, neutral_count = counts
+
+        if bullish_count >= 2 and bearish_count == 0:
+            action = "strong_buy" if bullish_count == 3 else "buy"
+        elif bearish_count >= 2 and bullish_count == 0:
+            action = "strong_sell" if bearish_count == 3 else "sell"
+        else:
+            action = "hold"  # Conservative approach for ties and mixed signals
+
+        assert action == expected_action
 
 
 if __name__ == "__main__":
@@ -1,11 +1,84 @@
+import copy
+import functools
 import pytest
-from unittest.mock import Mock, patch, MagicMock
-import json
+import types
+from collections import namedtuple
+from unittest.mock import DEFAULT, patch
+import numpy as np
 import pandas as pd
-from datetime import datetime
 
+from src.agents import technicals as technicals_module
 from src.agents.technicals import technical_analyst_agent
-from src.graph.state import AgentState
+from tests.conftest import loads, tally_signals
+
+# Lightweight price row: the agent only ever reads these six fields, so a
+# namedtuple is all the structure the fixtures need. model_dump mirrors the
+# pydantic Price interface that prices_to_df consumes.
+class Price(namedtuple("Price", ["time", "open", "high", "low", "close", "volume"])):
+    __slots__ = ()
+
+    def model_dump(self):
+        return self._asdict()
+
+
+_SIGNALS = frozenset({"bullish", "bearish", "neutral"})
+
+# Daily ISO timestamps formatted once in C; fixtures index into this instead
+# of running an f-string per row.
+_ISO_2024 = pd.date_range("2024-01-01", periods=60, freq="D").strftime("%Y-%m-%dT00:00:00Z").to_list()
+
+
+# Default agent state, deep-copied per test. The tuple of tickers is
+# immutable; the agent only iterates it.
+_BASE_STATE = {
+    "messages": [],
+    "data": {
+        "start_date": "2023-10-01",
+        "end_date": "2024-01-01",
+        "tickers": ("AAPL", "GOOGL"),
+        "analyst_signals": {},
+    },
+    "metadata": {
+        "show_reasoning": False,
+    },
+}
+
+
+def _parse(result):
+    """Decode the agent's JSON message, memoizing the result on the message.
+
+    Several assertions inspect the same output; parsing once per message keeps
+    repeat lookups free.
+    """
+    message = result["messages"][0]
+    parsed = getattr(message, "_parsed", None)
+    if parsed is None:
+        parsed = loads(message.content)
+        object.__setattr__(message, "_parsed", parsed)
+    return parsed
+
+
+def _assert_reasoning_has(analysis, ticker, *keys):
+    """Assert the ticker's reasoning contains every key, reporting all misses."""
+    reasoning = analysis[ticker]["reasoning"]
+    missing = [key for key in keys if key not in reasoning]
+    assert not missing, f"missing reasoning keys for {ticker}: {missing}"
+
+
+@functools.lru_cache(maxsize=16)
+def _make_prices(n, start=101.0, step=1.0, volume=1_000_000):
+    """Build n days of linearly trending prices (negative step for a downtrend).
+
+    The numeric columns are computed as ndarrays and zipped into rows in one
+    pass, instead of evaluating four arithmetic expressions per row. Results
+    are cached per parameter combination and returned as immutable tuples, so
+    tests requesting the same shape share one build.
+    """
+    close = start + step * np.arange(n, dtype=np.float64)
+    return tuple(
+        Price(time, c - 1.0, c + 1.0, c - 2.0, c, volume)
+        for time, c in zip(_ISO_2024[:n], close.tolist())
+    )
 
 
 class TestTechnicalsAgent:
@@ -13,241 +86,162 @@ class TestTechnicalsAgent:
 
     @pytest.fixture
     def mock_agent_state(self):
-        """Create a mock agent state for testing."""
-        return {
-            "data": {
-                "end_date": "2024-01-01",
-                "tickers": ["AAPL", "GOOGL"],
-                "analyst_signals": {}
-            },
-            "metadata": {
-                "show_reasoning": False
-            }
-        }
+        """Create a mock agent state for testing.
 
-    @pytest.fixture
+        Deep-copied per test: the agent writes analyst_signals back into the
+        state, and one test flips show_reasoning.
+        """
+        return copy.deepcopy(_BASE_STATE)
+
+    @pytest.fixture(scope="session")
     def mock_price_data(self):
-        """Create mock price data for testing."""
-        # Create a list of mock price objects
-        prices = []
-        for i in range(50):  # 50 days of data
-            price = Mock()
-            price.time = f"2024-{(i % 12) + 1}-{(i % 28) + 1}T00:00:00Z"
-            price.open = 100.0 + i
-            price.close = 101.0 + i
-            price.high = 102.0 + i
-            price.low = 99.0 + i
-            price.volume = 1000000 + i * 1000
-            prices.append(price)
-        return prices
-
-    @patch('src.agents.technicals.get_prices')
-    @patch('src.agents.technicals.get_api_key_from_state')
-    @patch('src.agents.technicals.progress')
-    def test_technical_analyst_success(self, mock_progress, mock_get_api_key, mock_get_prices, mock_agent_state, mock_price_data):
+        """Create 50 days of price data once per session (treated as read-only)."""
+        i = np.arange(50, dtype=float)
+        return pd.DataFrame({
+            "time": _ISO_2024[:50],
+            "open": 100.0 + i,
+            "close": 101.0 + i,
+            "high": 102.0 + i,
+            "low": 99.0 + i,
+            "volume": 1000000 + np.arange(50) * 1000,
+        })
+
+    @pytest.fixture
+    def patched(self):
+        """Patch the agent's external boundaries once and hand back the mocks.
+
+        Replaces the three-decorator stack each test used to repeat; the API
+        key is preset since every test wants the same value.
+        """
+        # Passing the module object skips the dotted-path resolution that a
+        # string target would redo for every test.
+        with patch.multiple(
+            technicals_module,
+            get_prices=DEFAULT,
+            get_api_key_from_state=DEFAULT,
+            show_agent_reasoning=DEFAULT,
+        ) as mocks:
+            mocks["get_api_key_from_state"].return_value = "test-api-key"
+            yield types.SimpleNamespace(**mocks)
+
+    def test_technical_analyst_success(self, patched, _silence_progress, mock_agent_state, mock_price_data):
         """Test successful technical analysis."""
-        # Setup mocks
-        mock_get_api_key.return_value = "test-api-key"
-        mock_get_prices.return_value = mock_price_data
-        
+        patched.get_prices.return_value = mock_price_data
+
         # Call the function
         result = technical_analyst_agent(mock_agent_state)
-        
+
         # Verify the result structure
         assert "messages" in result
         assert "data" in result
         assert len(result["messages"]) == 1
-        
+
         # Verify API calls
-        mock_get_prices.assert_called()
-        mock_get_api_key.assert_called_once()
-        
+        patched.get_prices.assert_called()
+        patched.get_api_key_from_state.assert_called_once()
+
         # Verify progress updates were called
-        assert mock_progress.update_status.call_count > 0
+        assert _silence_progress.update_status.call_count > 0
 
-    @patch('src.agents.technicals.get_prices')
-    @patch('src.agents.technicals.get_api_key_from_state')
-    @patch('src.agents.technicals.progress')
-    def test_technical_analyst_no_price_data(self, mock_progress, mock_get_api_key, mock_get_prices, mock_agent_state):
+    def test_technical_analyst_no_price_data(self, patched, mock_agent_state):
         """Test handling when no price data is available."""
-        # Setup mocks
-        mock_get_api_key.return_value = "test-api-key"
-        mock_get_prices.return_value = []
-        
+        patched.get_prices.return_value = []
+
         # Call the function
         result = technical_analyst_agent(mock_agent_state)
-        
+
         # Verify the result structure
         assert "messages" in result
         assert "data" in result
-        
+
         # Verify the analysis contains empty results for failed ticker
         analyst_signals = result["data"]["analyst_signals"]["technical_analyst_agent"]
         assert "AAPL" not in analyst_signals  # Should be skipped due to no data
 
-    @patch('src.agents.technicals.get_prices')
-    @patch('src.agents.technicals.get_api_key_from_state')
-    @patch('src.agents.technicals.progress')
-    @patch('src.agents.technicals.show_agent_reasoning')
-    def test_technical_analyst_with_reasoning(self, mock_show_reasoning, mock_progress, mock_get_api_key, mock_get_prices, mock_agent_state, mock_price_data):
+    def test_technical_analyst_with_reasoning(self, patched, mock_agent_state, mock_price_data):
         """Test technical analysis with reasoning enabled."""
         # Enable reasoning
         mock_agent_state["metadata"]["show_reasoning"] = True
-        
-        # Setup mocks
-        mock_get_api_key.return_value = "test-api-key"
-        mock_get_prices.return_value = mock_price_data
-        
+        patched.get_prices.return_value = mock_price_data
+
         # Call the function
         result = technical_analyst_agent(mock_agent_state)
-        
+
         # Verify reasoning was displayed
-        mock_show_reasoning.assert_called_once()
-
-    @patch('src.agents.technicals.get_prices')
-    @patch('src.agents.technicals.get_api_key_from_state')
-    @patch('src.agents.technicals.progress')
-    def test_rsi_calculation(self, mock_progress, mock_get_api_key, mock_get_prices, mock_agent_state):
-        """Test RSI calculation logic."""
-        # Create price data with clear trend for RSI testing
-        prices = []
-        for i in range(20):  # 20 days of data
-            price = Mock()
-            price.time = f"2024-01-{i+1:02d}T00:00:00Z"
-            # Create uptrend for overbought condition
-            price.close = 100.0 + (i * 2)  # Consistent upward movement
-            price.high = price.close + 1
-            price.low = price.close - 1
-            price.open = price.close - 0.5
-            price.volume = 1000000
-            prices.append(price)
-        
-        mock_get_api_key.return_value = "test-api-key"
-        mock_get_prices.return_value = prices
-        
-        # Call the function
-        result = technical_analyst_agent(mock_agent_state)
-        
-        # Extract analysis
-        analysis = json.loads(result["messages"][0].content)
-        aapl_analysis = analysis["AAPL"]
-        
-        # Verify RSI signal exists
-        assert "rsi_signal" in aapl_analysis["reasoning"]
-
-    @patch('src.agents.technicals.get_prices')
-    @patch('src.agents.technicals.get_api_key_from_state')
-    @patch('src.agents.technicals.progress')
-    def test_moving_average_analysis(self, mock_progress, mock_get_api_key, mock_get_prices, mock_agent_state, mock_price_data):
-        """Test moving average analysis."""
-        mock_get_api_key.return_value = "test-api-key"
-        mock_get_prices.return_value = mock_price_data
-        
-        # Call the function
-        result = technical_analyst_agent(mock_agent_state)
-        
-        # Extract analysis
-        analysis = json.loads(result["messages"][0].content)
-        aapl_analysis = analysis["AAPL"]
-        
-        # Verify moving average signals exist
-        assert "ma_signal" in aapl_analysis["reasoning"]
-        assert "signal" in aapl_analysis["reasoning"]["ma_signal"]
-        assert "details" in aapl_analysis["reasoning"]["ma_signal"]
-
-    @patch('src.agents.technicals.get_prices')
-    @patch('src.agents.technicals.get_api_key_from_state')
-    @patch('src.agents.technicals.progress')
-    def test_volume_analysis(self, mock_progress, mock_get_api_key, mock_get_prices, mock_agent_state, mock_price_data):
-        """Test volume analysis."""
-        mock_get_api_key.return_value = "test-api-key"
-        mock_get_prices.return_value = mock_price_data
-        
-        # Call the function
-        result = technical_analyst_agent(mock_agent_state)
-        
-        # Extract analysis
-        analysis = json.loads(result["messages"][0].content)
-        aapl_analysis = analysis["AAPL"]
-        
-        # Verify volume signal exists
-        assert "volume_signal" in aapl_analysis["reasoning"]
+        patched.show_agent_reasoning.assert_called_once()
+
+    @pytest.fixture(scope="class")
+    def agent_result(self, mock_price_data):
+        """Run the agent once on the 50-day uptrend for the indicator checks.
+
+        The RSI, moving-average, and volume tests only inspect different keys
+        of the same output, so the expensive agent invocation is shared.
+        Class scope means the function-scoped patched fixture cannot be used;
+        the boundaries are patched locally instead.
+        """
+        with patch.multiple(
+            technicals_module,
+            get_prices=DEFAULT,
+            get_api_key_from_state=DEFAULT,
+            progress=DEFAULT,
+        ) as mocks:
+            mocks["get_prices"].return_value = mock_price_data
+            mocks["get_api_key_from_state"].return_value = "test-api-key"
+            return technical_analyst_agent(copy.deepcopy(_BASE_STATE))
+
+    @pytest.mark.parametrize("strategy, metric", [
+        ("mean_reversion", "rsi_14"),       # RSI
+        ("trend_following", "adx"),         # moving averages / trend
+        ("momentum", "volume_momentum"),    # volume
+    ])
+    def test_indicator_signals_present(self, agent_result, strategy, metric):
+        """Each indicator family surfaces a signal and its metrics."""
+        analysis = _parse(agent_result)
+        _assert_reasoning_has(analysis, "AAPL", strategy)
+
+        strategy_reasoning = analysis["AAPL"]["reasoning"][strategy]
+        assert "signal" in strategy_reasoning
+        assert metric in strategy_reasoning["metrics"]
 
-    @patch('src.agents.technicals.get_prices')
-    @patch('src.agents.technicals.get_api_key_from_state')
-    @patch('src.agents.technicals.progress')
-    def test_multiple_tickers_analysis(self, mock_progress, mock_get_api_key, mock_get_prices, mock_agent_state):
+    def test_multiple_tickers_analysis(self, patched, mock_agent_state):
         """Test analysis with multiple tickers."""
         # Create different price data for each ticker
-        prices_aapl = []
-        prices_googl = []
+        prices_aapl = _make_prices(30)  # AAPL - uptrend
+        prices_googl = _make_prices(30, start=199.0, step=-1.0, volume=800000)  # GOOGL - downtrend
         
-        for i in range(30):
-            # AAPL - uptrend
-            price_aapl = Mock()
-            price_aapl.time = f"2024-01-{i+1:02d}T00:00:00Z"
-            price_aapl.open = 100.0 + i
-            price_aapl.close = 101.0 + i
-            price_aapl.high = 102.0 + i
-            price_aapl.low = 99.0 + i
-            price_aapl.volume = 1000000
-            prices_aapl.append(price_aapl)
-            
-            # GOOGL - downtrend
-            price_googl = Mock()
-            price_googl.time = f"2024-01-{i+1:02d}T00:00:00Z"
-            price_googl.open = 200.0 - i
-            price_googl.close = 199.0 - i
-            price_googl.high = 201.0 - i
-            price_googl.low = 198.0 - i
-            price_googl.volume = 800000
-            prices_googl.append(price_googl)
-        
-        mock_get_api_key.return_value = "test-api-key"
-        mock_get_prices.side_effect = [prices_aapl, prices_googl]
+        patched.get_prices.side_effect = [prices_aapl, prices_googl]
         
         # Call the function
         result = technical_analyst_agent(mock_agent_state)
         
         # Extract analysis
-        analysis = json.loads(result["messages"][0].content)
+        analysis = _parse(result)
         
         # Verify both tickers were analyzed
         assert "AAPL" in analysis
         assert "GOOGL" in analysis
         
         # Verify different signals for different trends
-        assert analysis["AAPL"]["signal"] in ["bullish", "bearish", "neutral"]
-        assert analysis["GOOGL"]["signal"] in ["bullish", "bearish", "neutral"]
+        assert analysis["AAPL"]["signal"] in _SIGNALS
+        assert analysis["GOOGL"]["signal"] in _SIGNALS
 
     def test_price_data_transformation(self):
         """Test price data transformation for technical indicators."""
-        # Test creating DataFrame from mock price objects
-        prices = []
-        for i in range(10):
-            price = Mock()
-            price.time = f"2024-01-{i+1:02d}T00:00:00Z"
-            price.open = 100.0 + i
-            price.close = 101.0 + i
-            price.high = 102.0 + i
-            price.low = 99.0 + i
-            price.volume = 1000000
-            prices.append(price)
-        
-        # Simulate DataFrame creation
-        data = []
-        for price in prices:
-            data.append({
-                'time': price.time,
-                'open': price.open,
-                'high': price.high,
-                'low': price.low,
-                'close': price.close,
-                'volume': price.volume
-            })
-        
-        df = pd.DataFrame(data)
-        
+        # Test creating DataFrame from price objects
+        prices = _make_prices(10)
+
+        # Column-oriented construction skips pandas' per-row dict inference;
+        # typed ndarrays are adopted without a further conversion pass.
+        n = len(prices)
+        df = pd.DataFrame({
+            'time': [p.time for p in prices],
+            'open': np.fromiter((p.open for p in prices), dtype=np.float64, count=n),
+            'high': np.fromiter((p.high for p in prices), dtype=np.float64, count=n),
+            'low': np.fromiter((p.low for p in prices), dtype=np.float64, count=n),
+            'close': np.fromiter((p.close for p in prices), dtype=np.float64, count=n),
+            'volume': np.fromiter((p.volume for p in prices), dtype=np.int64, count=n),
+        })
+
         # Verify DataFrame structure
         assert len(df) == 10
         assert list(df.columns) == ['time', 'open', 'high', 'low', 'close', 'volume']
@@ -258,9 +252,11 @@ class TestTechnicalsAgent:
         """Test how multiple technical signals are combined."""
         # Test signal combination logic
         signals = ["bullish", "bearish", "neutral", "bullish"]
-        
-        bullish_count = signals.count("bullish")
-        bearish_count = signals.count("bearish")
+
+        # Single pass over the signals instead of one scan per label
+        counts = tally_signals(signals)
+        bullish_count = counts["bullish"]
+        bearish_count = counts["bearish"]
         
         if bullish_count > bearish_count:
             overall_signal = "bullish"
@@ -276,25 +272,10 @@ class TestTechnicalsAgent:
         confidence = round(max(bullish_count, bearish_count) / total_signals, 2) * 100
         assert confidence == 50.0
 
-    @patch('src.agents.technicals.get_prices')
-    @patch('src.agents.technicals.get_api_key_from_state')
-    @patch('src.agents.technicals.progress')
-    def test_insufficient_data_handling(self, mock_progress, mock_get_api_key, mock_get_prices, mock_agent_state):
+    def test_insufficient_data_handling(self, patched, mock_agent_state):
         """Test handling of insufficient price data for technical indicators."""
         # Create minimal price data (less than required for some indicators)
-        prices = []
-        for i in range(5):  # Only 5 days of data
-            price = Mock()
-            price.time = f"2024-01-{i+1:02d}T00:00:00Z"
-            price.open = 100.0 + i
-            price.close = 101.0 + i
-            price.high = 102.0 + i
-            price.low = 99.0 + i
-            price.volume = 1000000
-            prices.append(price)
-        
-        mock_get_api_key.return_value = "test-api-key"
-        mock_get_prices.return_value = prices
+        patched.get_prices.return_value = _make_prices(5)  # Only 5 days of data
         
         # Call the function
         result = technical_analyst_agent(mock_agent_state)